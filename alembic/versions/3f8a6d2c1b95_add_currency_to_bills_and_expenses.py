@@ -0,0 +1,33 @@
+"""Add currency to bills and expenses
+
+Revision ID: 3f8a6d2c1b95
+Revises: e07a3c5d9f14
+Create Date: 2026-10-19 15:42:18.604213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3f8a6d2c1b95'
+down_revision: Union[str, Sequence[str], None] = 'e07a3c5d9f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENCY_TABLES = ['bills', 'expenses']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows were all recorded in dollars
+    for table in CURRENCY_TABLES:
+        op.add_column(table, sa.Column('currency', sa.String(length=3), server_default='USD', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in CURRENCY_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('currency')
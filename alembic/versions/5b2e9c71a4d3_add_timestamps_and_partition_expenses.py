@@ -0,0 +1,131 @@
+"""Add created_at timestamps and partition expenses by month
+
+Revision ID: 5b2e9c71a4d3
+Revises: ce481d3b608e
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5b2e9c71a4d3'
+down_revision: Union[str, Sequence[str], None] = 'ce481d3b608e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created ahead of "now"; later months are added with
+# `python -m app.core.partitions ensure`.
+MONTHS_AHEAD = 3
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_expenses() -> None:
+    """Rebuild expenses as a table range-partitioned by month on created_at."""
+    bind = op.get_bind()
+    op.execute("ALTER TABLE expenses RENAME TO expenses_legacy")
+    op.execute("ALTER TABLE expenses_legacy RENAME CONSTRAINT expenses_pkey TO expenses_legacy_pkey")
+    op.execute("ALTER INDEX ix_expenses_id RENAME TO ix_expenses_legacy_id")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE expenses (
+            id INTEGER NOT NULL DEFAULT nextval('expenses_id_seq'),
+            bill_id INTEGER NOT NULL,
+            amount_owed DOUBLE PRECISION NOT NULL,
+            amount_paid DOUBLE PRECISION NOT NULL,
+            split_method VARCHAR NOT NULL,
+            user_id INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT expenses_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT expenses_bill_id_fkey FOREIGN KEY (bill_id) REFERENCES bills (id),
+            CONSTRAINT expenses_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE expenses_default PARTITION OF expenses DEFAULT")
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM expenses_legacy")).scalar()
+    first = (oldest.date() if oldest else date.today()).replace(day=1)
+    last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    month = first
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE expenses_y{month:%Y}m{month:%m} PARTITION OF expenses "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute("""
+        INSERT INTO expenses (id, bill_id, amount_owed, amount_paid, split_method, user_id, created_at)
+        SELECT id, bill_id, amount_owed, amount_paid, split_method, user_id, created_at
+        FROM expenses_legacy
+    """)
+    op.execute("DROP TABLE expenses_legacy")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id")
+    op.create_index(op.f('ix_expenses_id'), 'expenses', ['id'], unique=False)
+
+
+def _unpartition_expenses() -> None:
+    """Fold the monthly partitions back into a single plain expenses table."""
+    op.execute("ALTER TABLE expenses RENAME TO expenses_partitioned")
+    op.execute("ALTER TABLE expenses_partitioned RENAME CONSTRAINT expenses_pkey TO expenses_partitioned_pkey")
+    op.execute("ALTER INDEX ix_expenses_id RENAME TO ix_expenses_partitioned_id")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE expenses (
+            id INTEGER NOT NULL DEFAULT nextval('expenses_id_seq'),
+            bill_id INTEGER NOT NULL REFERENCES bills (id),
+            amount_owed DOUBLE PRECISION NOT NULL,
+            amount_paid DOUBLE PRECISION NOT NULL,
+            split_method VARCHAR NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT expenses_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO expenses (id, bill_id, amount_owed, amount_paid, split_method, user_id, created_at)
+        SELECT id, bill_id, amount_owed, amount_paid, split_method, user_id, created_at
+        FROM expenses_partitioned
+    """)
+    op.execute("DROP TABLE expenses_partitioned CASCADE")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id")
+    op.create_index(op.f('ix_expenses_id'), 'expenses', ['id'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    # SQLite can only add columns with constant defaults, so it copies the tables
+    recreate = "auto" if is_postgres else "always"
+    with op.batch_alter_table('bills', recreate=recreate) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+        batch_op.create_index(batch_op.f('ix_bills_created_at'), ['created_at'], unique=False)
+    with op.batch_alter_table('expenses', recreate=recreate) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+
+    if is_postgres:
+        _partition_expenses()
+    op.create_index('ix_expenses_created_at', 'expenses', ['created_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    op.drop_index('ix_expenses_created_at', table_name='expenses')
+    if is_postgres:
+        _unpartition_expenses()
+    with op.batch_alter_table('expenses') as batch_op:
+        batch_op.drop_column('created_at')
+    with op.batch_alter_table('bills') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bills_created_at'))
+        batch_op.drop_column('created_at')
@@ -0,0 +1,46 @@
+"""Reserve bill and expense ids globally and map group bills to shards
+
+Revision ID: 7c2d5e8a9f31
+Revises: 3f8a6d2c1b95
+Create Date: 2026-10-19 17:08:44.219870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7c2d5e8a9f31'
+down_revision: Union[str, Sequence[str], None] = '3f8a6d2c1b95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ids that must never be reused on SQLite: bill and expense ids are reserved
+# for rows on other shards, and user ids are kept by the users' shard copies
+AUTOINCREMENT_TABLES = ['users', 'bills', 'expenses']
+
+
+def _set_sqlite_autoincrement(enabled: bool) -> None:
+    # Postgres sequences already never hand out an id twice
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table in AUTOINCREMENT_TABLES:
+        with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": enabled}):
+            pass
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bill_shard_map',
+    sa.Column('bill_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bill_id')
+    )
+    _set_sqlite_autoincrement(True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_sqlite_autoincrement(False)
+    op.drop_table('bill_shard_map')
@@ -0,0 +1,59 @@
+"""Add groups, group members and the shard map
+
+Revision ID: 9d41f0c2b7e8
+Revises: 5b2e9c71a4d3
+Create Date: 2026-10-19 10:03:17.552930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9d41f0c2b7e8'
+down_revision: Union[str, Sequence[str], None] = '5b2e9c71a4d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('groups',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_groups_id'), 'groups', ['id'], unique=False)
+    op.create_table('group_members',
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], )
+    )
+    op.create_table('shard_map',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('shard_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('group_id')
+    )
+    op.create_index(op.f('ix_shard_map_shard_id'), 'shard_map', ['shard_id'], unique=False)
+    with op.batch_alter_table('bills') as batch_op:
+        batch_op.add_column(sa.Column('group_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_bills_group_id'), ['group_id'], unique=False)
+        batch_op.create_foreign_key('bills_group_id_fkey', 'groups', ['group_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('bills') as batch_op:
+        batch_op.drop_constraint('bills_group_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_bills_group_id'))
+        batch_op.drop_column('group_id')
+    op.drop_index(op.f('ix_shard_map_shard_id'), table_name='shard_map')
+    op.drop_table('shard_map')
+    op.drop_table('group_members')
+    op.drop_index(op.f('ix_groups_id'), table_name='groups')
+    op.drop_table('groups')
@@ -0,0 +1,71 @@
+"""Cascade foreign keys on delete and add soft-delete tombstones
+
+Revision ID: e07a3c5d9f14
+Revises: 9d41f0c2b7e8
+Create Date: 2026-10-19 11:26:05.307441
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e07a3c5d9f14'
+down_revision: Union[str, Sequence[str], None] = '9d41f0c2b7e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Gives SQLite's unnamed foreign keys a name batch mode can drop them by
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# (table, column, referred table, ON DELETE action)
+FOREIGN_KEYS = [
+    ('bills', 'created_by', 'users', 'SET NULL'),
+    ('bill_participants', 'bill_id', 'bills', 'CASCADE'),
+    ('bill_participants', 'user_id', 'users', 'CASCADE'),
+    ('expenses', 'bill_id', 'bills', 'CASCADE'),
+    ('expenses', 'user_id', 'users', 'CASCADE'),
+    ('groups', 'created_by', 'users', 'SET NULL'),
+    ('group_members', 'group_id', 'groups', 'CASCADE'),
+    ('group_members', 'user_id', 'users', 'CASCADE'),
+]
+
+SOFT_DELETE_TABLES = ['users', 'bills', 'expenses']
+
+
+def _replace_foreign_keys(cascade: bool) -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    for table, column, referred, ondelete in FOREIGN_KEYS:
+        name = f"{table}_{column}_fkey"
+        # Earlier migrations left these keys unnamed on SQLite
+        old_name = name if is_postgres or not cascade else f"fk_{table}_{column}_{referred}"
+        with op.batch_alter_table(table, naming_convention=SQLITE_NAMING) as batch_op:
+            batch_op.drop_constraint(old_name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete if cascade else None)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_keys(cascade=True)
+
+    # Cascades and the purge look expenses up by their parents
+    op.create_index(op.f('ix_expenses_bill_id'), 'expenses', ['bill_id'], unique=False)
+    op.create_index(op.f('ix_expenses_user_id'), 'expenses', ['user_id'], unique=False)
+
+    for table in SOFT_DELETE_TABLES:
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+        op.create_index(op.f(f'ix_{table}_deleted_at'), table, ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(SOFT_DELETE_TABLES):
+        op.drop_index(op.f(f'ix_{table}_deleted_at'), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('deleted_at')
+
+    op.drop_index(op.f('ix_expenses_user_id'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_bill_id'), table_name='expenses')
+
+    _replace_foreign_keys(cascade=False)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.profiling import ProfiledRoute
+from app.core.security import (
+    CREDENTIALS_ERROR, active_users, create_access_token, denylist,
+    get_current_claims, get_current_principal, verify_password
+)
+from app.models.user import User
+from app.models.schemas import Principal, Token
+
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=ProfiledRoute)
+
+@router.post("/token", response_model=Token)
+def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_read_db)):
+    """Exchange email (as `username`) and password for an access token"""
+    user = db.query(User).filter(User.email == form.username).first()
+    if not verify_password(form.password, user.password if user else None) or not user.is_active:
+        raise CREDENTIALS_ERROR
+    active_users.set(user.id, True)
+    return Token(
+        access_token=create_access_token(user),
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(claims: dict = Depends(get_current_claims)):
+    """Revoke the presented token"""
+    denylist.revoke(claims["jti"], claims["exp"])
+    return None
+
+@router.get("/me", response_model=Principal)
+def read_current_user(principal: Principal = Depends(get_current_principal)):
+    """The authenticated user, built from token claims plus a cached is_active check"""
+    return principal
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.core.loader import BatchLoader
+from app.core.profiling import ProfiledRoute
+from app.models.schemas import BatchRequest, BatchResponse, BatchUser, BatchBill, ExpenseResponse
+
+router = APIRouter(prefix="/batch", tags=["batch"], route_class=ProfiledRoute)
+
+# (entity, relation) -> node field receiving the related ids
+LINK_FIELDS = {
+    ("users", "bills"): "bill_ids",
+    ("users", "created_bills"): "created_bill_ids",
+    ("bills", "participants"): "participant_ids",
+    ("bills", "expenses"): "expense_ids",
+}
+
+NODE_SCHEMAS = {"users": BatchUser, "bills": BatchBill, "expenses": ExpenseResponse}
+
+@router.post("/", response_model=BatchResponse)
+def batch_fetch(request: BatchRequest, db: Session = Depends(get_read_db)):
+    """
+    Fetch users, bills and expenses plus related entities in one round trip
+
+    Lookups are coalesced into one IN query per entity type and relation, and the
+    result is a flat graph keyed by id in which relations are lists of ids.
+    Include paths start at an entity type, e.g. "users.bills.expenses",
+    "bills.participants" or "expenses.bill.created_by_user". Bills and expenses
+    of groups on other shards are read from their shard.
+    """
+    loader = BatchLoader(db)
+    try:
+        return build_graph(loader, request)
+    finally:
+        loader.close()
+
+def build_graph(loader: BatchLoader, request: BatchRequest) -> BatchResponse:
+    roots = {"users": request.users, "bills": request.bills, "expenses": request.expenses}
+    try:
+        for entity, ids in roots.items():
+            loader.load(entity, ids)
+        for path in request.include:
+            loader.resolve(path, roots)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    graph = {}
+    for entity, cache in loader.entities.items():
+        schema = NODE_SCHEMAS[entity]
+        graph[entity] = {obj_id: schema.model_validate(obj) for obj_id, obj in cache.items() if obj is not None}
+    for (entity, relation), links in loader.links.items():
+        field = LINK_FIELDS[(entity, relation)]
+        for parent_id, child_ids in links.items():
+            setattr(graph[entity][parent_id], field, child_ids)
+    return BatchResponse(**graph)
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
-from app.core.database import get_db
-from app.models import User, Bill
-from app.models.schemas import BillCreate, BillUpdate, BillResponse
+from app.core.balances import expense_totals, grouped_expenses, settle
+from app.core.config import settings
+from app.core.currency import get_rate_index
+from app.core.database import get_db, get_read_db
+from app.core.profiling import ProfiledRoute
+from app.core.purge import purge_deleted
+from app.core.sharding import get_bill_db, get_bill_read_db
+from app.models import User, Bill, Expense
+from app.models.schemas import (
+    BillCreate, BillUpdate, BillResponse, Balance, BillBalancesResponse, SettlementResponse, Transfer
+)
 
-router = APIRouter(prefix="/bills", tags=["bills"])
+router = APIRouter(prefix="/bills", tags=["bills"], route_class=ProfiledRoute)
 
 @router.post("/", response_model=BillResponse, status_code=status.HTTP_201_CREATED)
 def create_bill(bill: BillCreate, db: Session = Depends(get_db)):
@@ -22,6 +32,7 @@ def create_bill(bill: BillCreate, db: Session = Depends(get_db)):
     db_bill = Bill(
         title=bill.title,
         total_amount=bill.total_amount,
+        currency=bill.currency,
         created_by=bill.created_by
     )
     db.add(db_bill)
@@ -46,13 +57,27 @@ def create_bill(bill: BillCreate, db: Session = Depends(get_db)):
     return db_bill
 
 @router.get("/", response_model=List[BillResponse])
-def get_bills(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all bills with pagination"""
-    bills = db.query(Bill).offset(skip).limit(limit).all()
+def get_bills(
+    skip: int = 0,
+    limit: int = 100,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get all bills with pagination, optionally within [created_after, created_before)
+
+    Lists the main database only; bills of groups on other shards are listed per group.
+    """
+    query = db.query(Bill)
+    if created_after:
+        query = query.filter(Bill.created_at >= created_after)
+    if created_before:
+        query = query.filter(Bill.created_at < created_before)
+    bills = query.order_by(Bill.id).offset(skip).limit(limit).all()
     return bills
 
 @router.get("/{bill_id}", response_model=BillResponse)
-def get_bill(bill_id: int, db: Session = Depends(get_db)):
+def get_bill(bill_id: int, db: Session = Depends(get_bill_read_db)):
     """Get a specific bill by ID"""
     bill = db.query(Bill).filter(Bill.id == bill_id).first()
     if not bill:
@@ -62,8 +87,54 @@ def get_bill(bill_id: int, db: Session = Depends(get_db)):
         )
     return bill
 
+def get_bill_balances(db: Session, bill_id: int, currency: str) -> dict:
+    """Owed/paid per participant of a bill, converted into `currency`"""
+    if not db.query(Bill.id).filter(Bill.id == bill_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bill not found"
+        )
+    try:
+        return expense_totals(grouped_expenses(db, Expense.bill_id == bill_id), currency, get_rate_index())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/{bill_id}/balances", response_model=BillBalancesResponse)
+def get_balances(
+    bill_id: int,
+    currency: str = Query(settings.REPORTING_CURRENCY, pattern=r"^[A-Za-z]{3}$"),
+    db: Session = Depends(get_bill_read_db)
+):
+    """Get what each participant owes and has paid, in the reporting currency"""
+    currency = currency.upper()
+    totals = get_bill_balances(db, bill_id, currency)
+    balances = [
+        Balance(user_id=user_id, owed=owed, paid=paid, net=round(paid - owed, 2))
+        for user_id, (owed, paid) in sorted(totals.items())
+    ]
+    return BillBalancesResponse(bill_id=bill_id, currency=currency, balances=balances)
+
+@router.get("/{bill_id}/settlement", response_model=SettlementResponse)
+def get_settlement(
+    bill_id: int,
+    currency: str = Query(settings.REPORTING_CURRENCY, pattern=r"^[A-Za-z]{3}$"),
+    db: Session = Depends(get_bill_read_db)
+):
+    """Get the fewest transfers that settle a bill, in the reporting currency"""
+    currency = currency.upper()
+    totals = get_bill_balances(db, bill_id, currency)
+    transfers = settle({user_id: paid - owed for user_id, (owed, paid) in totals.items()})
+    return SettlementResponse(
+        bill_id=bill_id,
+        currency=currency,
+        transfers=[Transfer(from_user_id=f, to_user_id=t, amount=a) for f, t, a in transfers]
+    )
+
 @router.put("/{bill_id}", response_model=BillResponse)
-def update_bill(bill_id: int, bill_update: BillUpdate, db: Session = Depends(get_db)):
+def update_bill(bill_id: int, bill_update: BillUpdate, db: Session = Depends(get_bill_db)):
     """Update a bill's basic information"""
     db_bill = db.query(Bill).filter(Bill.id == bill_id).first()
     if not db_bill:
@@ -82,7 +153,7 @@ def update_bill(bill_id: int, bill_update: BillUpdate, db: Session = Depends(get
     return db_bill
 
 @router.post("/{bill_id}/participants", response_model=BillResponse)
-def add_participants_to_bill(bill_id: int, participant_ids: List[int], db: Session = Depends(get_db)):
+def add_participants_to_bill(bill_id: int, participant_ids: List[int], db: Session = Depends(get_bill_db)):
     """Add participants to an existing bill"""
     # Get the bill
     db_bill = db.query(Bill).filter(Bill.id == bill_id).first()
@@ -92,7 +163,7 @@ def add_participants_to_bill(bill_id: int, participant_ids: List[int], db: Sessi
             detail="Bill not found"
         )
     
-    # Verify all participants exist
+    # Verify all participants exist; a group's shard only holds copies of its members
     participants = db.query(User).filter(User.id.in_(participant_ids)).all()
     if len(participants) != len(participant_ids):
         raise HTTPException(
@@ -118,7 +189,7 @@ def add_participants_to_bill(bill_id: int, participant_ids: List[int], db: Sessi
     return db_bill
 
 @router.delete("/{bill_id}/participants/{user_id}", response_model=BillResponse)
-def remove_participant_from_bill(bill_id: int, user_id: int, db: Session = Depends(get_db)):
+def remove_participant_from_bill(bill_id: int, user_id: int, db: Session = Depends(get_bill_db)):
     """Remove a participant from a bill"""
     db_bill = db.query(Bill).filter(Bill.id == bill_id).first()
     if not db_bill:
@@ -143,15 +214,20 @@ def remove_participant_from_bill(bill_id: int, user_id: int, db: Session = Depen
     return db_bill
 
 @router.delete("/{bill_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_bill(bill_id: int, db: Session = Depends(get_db)):
-    """Delete a bill"""
-    db_bill = db.query(Bill).filter(Bill.id == bill_id).first()
-    if not db_bill:
+def delete_bill(bill_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_bill_db)):
+    """Delete a bill along with its expenses and participant links"""
+    query = db.query(Bill).filter(Bill.id == bill_id, Bill.deleted_at.is_(None))
+    if settings.SOFT_DELETE:
+        deleted = query.update({Bill.deleted_at: func.now()}, synchronize_session=False)
+        background_tasks.add_task(purge_deleted, bind=db.get_bind())
+    else:
+        # Expenses and participant links go with it via ON DELETE CASCADE
+        deleted = query.delete(synchronize_session=False)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bill not found"
         )
     
-    db.delete(db_bill)
     db.commit()
     return None
\ No newline at end of file
@@ -1,18 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.profiling import ProfiledRoute
+from app.core.purge import purge_deleted
+from app.core.sharding import (
+    bill_session, get_bill_db, get_bill_read_db, get_expense_db, get_expense_read_db, shard_router
+)
 from app.models import User, Bill, Expense
 from app.models.schemas import ExpenseCreate, ExpenseUpdate, ExpenseResponse, ExpenseResponseWithRelations, SplitMethod
 
-router = APIRouter(prefix="/expenses", tags=["expenses"])
+router = APIRouter(prefix="/expenses", tags=["expenses"], route_class=ProfiledRoute)
 
 @router.post("/", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
 def create_expense(expense: ExpenseCreate, db: Session = Depends(get_db)):
     """Create a new expense entry"""
+    with bill_session(db, expense.bill_id) as bill_db:
+        return create_bill_expense(db, bill_db, expense)
+
+def create_bill_expense(db: Session, bill_db: Session, expense: ExpenseCreate) -> Expense:
+    """Create an expense on the shard session `bill_db` that owns its bill"""
     # Verify bill exists
-    bill = db.query(Bill).filter(Bill.id == expense.bill_id).first()
+    bill = bill_db.query(Bill).filter(Bill.id == expense.bill_id).first()
     if not bill:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -20,7 +33,7 @@ def create_expense(expense: ExpenseCreate, db: Session = Depends(get_db)):
         )
     
     # Verify user exists
-    user = db.query(User).filter(User.id == expense.user_id).first()
+    user = bill_db.query(User).filter(User.id == expense.user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -40,17 +53,26 @@ def create_expense(expense: ExpenseCreate, db: Session = Depends(get_db)):
         user_id=expense.user_id,
         amount_owed=expense.amount_owed,
         amount_paid=expense.amount_paid,
+        currency=expense.currency or bill.currency,
         split_method=expense.split_method
     )
+    if bill_db is not db:
+        # Ids off shard 0 come from the main database so they stay globally unique
+        db_expense.id = shard_router.reserve_ids(db, Expense, 1)[0]
     
-    db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+    bill_db.add(db_expense)
+    bill_db.commit()
+    bill_db.refresh(db_expense)
     return db_expense
 
 @router.get("/bill/{bill_id}", response_model=List[ExpenseResponseWithRelations])
-def get_expenses_by_bill(bill_id: int, db: Session = Depends(get_db)):
-    """Get all expenses for a specific bill"""
+def get_expenses_by_bill(
+    bill_id: int,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_bill_read_db)
+):
+    """Get all expenses for a specific bill, optionally within [created_after, created_before)"""
     # Verify bill exists
     bill = db.query(Bill).filter(Bill.id == bill_id).first()
     if not bill:
@@ -59,11 +81,16 @@ def get_expenses_by_bill(bill_id: int, db: Session = Depends(get_db)):
             detail="Bill not found"
         )
     
-    expenses = db.query(Expense).filter(Expense.bill_id == bill_id).all()
+    query = db.query(Expense).filter(Expense.bill_id == bill_id)
+    if created_after:
+        query = query.filter(Expense.created_at >= created_after)
+    if created_before:
+        query = query.filter(Expense.created_at < created_before)
+    expenses = query.all()
     return expenses
 
 @router.get("/{expense_id}", response_model=ExpenseResponseWithRelations)
-def get_expense(expense_id: int, db: Session = Depends(get_db)):
+def get_expense(expense_id: int, db: Session = Depends(get_expense_read_db)):
     """Get a specific expense by ID"""
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
     if not expense:
@@ -74,7 +101,7 @@ def get_expense(expense_id: int, db: Session = Depends(get_db)):
     return expense
 
 @router.put("/{expense_id}", response_model=ExpenseResponse)
-def update_expense(expense_id: int, expense_update: ExpenseUpdate, db: Session = Depends(get_db)):
+def update_expense(expense_id: int, expense_update: ExpenseUpdate, db: Session = Depends(get_expense_db)):
     """Update an expense"""
     db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
     if not db_expense:
@@ -97,7 +124,8 @@ def split_bill_expenses(
     bill_id: int, 
     split_method: SplitMethod = SplitMethod.EQUAL,
     custom_amounts: dict = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    bill_db: Session = Depends(get_bill_db)
 ):
     """
     Split a bill among participants and create expense entries
@@ -107,7 +135,7 @@ def split_bill_expenses(
     - percentage: Use custom_amounts dict {user_id: percentage} (must sum to 100)
     """
     # Get bill with participants
-    bill = db.query(Bill).filter(Bill.id == bill_id).first()
+    bill = bill_db.query(Bill).filter(Bill.id == bill_id).first()
     if not bill:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,7 +149,7 @@ def split_bill_expenses(
         )
     
     # Delete existing expenses for this bill
-    db.query(Expense).filter(Expense.bill_id == bill_id).delete()
+    bill_db.query(Expense).filter(Expense.bill_id == bill_id).delete()
     
     expenses = []
     
@@ -134,9 +162,10 @@ def split_bill_expenses(
                 user_id=participant.id,
                 amount_owed=round(amount_per_person, 2),
                 amount_paid=0.0,
+                currency=bill.currency,
                 split_method=split_method
             )
-            db.add(expense)
+            bill_db.add(expense)
             expenses.append(expense)
     
     elif split_method == SplitMethod.EXACT:
@@ -171,9 +200,10 @@ def split_bill_expenses(
                 user_id=participant.id,
                 amount_owed=round(amount, 2),
                 amount_paid=0.0,
+                currency=bill.currency,
                 split_method=split_method
             )
-            db.add(expense)
+            bill_db.add(expense)
             expenses.append(expense)
     
     elif split_method == SplitMethod.PERCENTAGE:
@@ -209,19 +239,25 @@ def split_bill_expenses(
                 user_id=participant.id,
                 amount_owed=round(amount, 2),
                 amount_paid=0.0,
+                currency=bill.currency,
                 split_method=split_method
             )
-            db.add(expense)
+            bill_db.add(expense)
             expenses.append(expense)
     
-    db.commit()
+    if bill_db is not db and expenses:
+        # Ids off shard 0 come from the main database so they stay globally unique
+        for expense, expense_id in zip(expenses, shard_router.reserve_ids(db, Expense, len(expenses))):
+            expense.id = expense_id
+    
+    bill_db.commit()
     for expense in expenses:
-        db.refresh(expense)
+        bill_db.refresh(expense)
     
     return expenses
 
 @router.put("/{expense_id}/payment", response_model=ExpenseResponse)
-def record_payment(expense_id: int, amount_paid: float, db: Session = Depends(get_db)):
+def record_payment(expense_id: int, amount_paid: float, db: Session = Depends(get_expense_db)):
     """Record a payment towards an expense"""
     if amount_paid < 0:
         raise HTTPException(
@@ -244,15 +280,19 @@ def record_payment(expense_id: int, amount_paid: float, db: Session = Depends(ge
     return expense
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense(expense_id: int, db: Session = Depends(get_db)):
+def delete_expense(expense_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_expense_db)):
     """Delete an expense"""
-    expense = db.query(Expense).filter(Expense.id == expense_id).first()
-    if not expense:
+    query = db.query(Expense).filter(Expense.id == expense_id, Expense.deleted_at.is_(None))
+    if settings.SOFT_DELETE:
+        deleted = query.update({Expense.deleted_at: func.now()}, synchronize_session=False)
+        background_tasks.add_task(purge_deleted, bind=db.get_bind())
+    else:
+        deleted = query.delete(synchronize_session=False)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Expense not found"
         )
     
-    db.delete(expense)
     db.commit()
     return None
\ No newline at end of file
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.database import get_db
+from app.core.profiling import ProfiledRoute
+from app.core.sharding import shard_router, replicate_users
+from app.models import User, Bill, Group
+from app.models.schemas import GroupCreate, GroupResponse, BillCreate, BillResponse
+
+router = APIRouter(prefix="/groups", tags=["groups"], route_class=ProfiledRoute)
+
+def get_group_db(group_id: int, db: Session = Depends(get_db)):
+    """Session on the shard that owns the group; `db` stays the directory session"""
+    shard_id = shard_router.shard_for(db, group_id)
+    if shard_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found"
+        )
+    if shard_id == 0:
+        yield db
+        return
+    shard_db = shard_router.session(shard_id)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+def get_directory_users(db: Session, user_ids: List[int]) -> List[User]:
+    """Resolve global user ids through the directory, 404 if any is unknown"""
+    users = db.query(User).filter(User.id.in_(user_ids)).all()
+    if len(users) != len(set(user_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="One or more users not found"
+        )
+    return users
+
+def get_group_or_404(shard_db: Session, group_id: int) -> Group:
+    group = shard_db.get(Group, group_id)
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group not found"
+        )
+    return group
+
+@router.post("/", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
+def create_group(group: GroupCreate, db: Session = Depends(get_db)):
+    """Create a group on the least loaded shard"""
+    member_ids = set(group.member_ids or []) | {group.created_by}
+    members = get_directory_users(db, list(member_ids))
+
+    mapping = shard_router.place_group(db)
+    shard_db = db if mapping.shard_id == 0 else shard_router.session(mapping.shard_id)
+    try:
+        db_group = Group(id=mapping.group_id, name=group.name, created_by=group.created_by)
+        db_group.members.extend(replicate_users(db, shard_db, members))
+        shard_db.add(db_group)
+        shard_db.commit()
+        # Publish the placement only once the group exists on its shard
+        db.commit()
+        shard_db.refresh(db_group)
+        return GroupResponse.model_validate(db_group)
+    except Exception:
+        shard_db.rollback()
+        db.rollback()
+        raise
+    finally:
+        if shard_db is not db:
+            shard_db.close()
+
+@router.get("/{group_id}", response_model=GroupResponse)
+def get_group(group_id: int, shard_db: Session = Depends(get_group_db)):
+    """Get a specific group by ID"""
+    return get_group_or_404(shard_db, group_id)
+
+@router.post("/{group_id}/members", response_model=GroupResponse)
+def add_group_members(
+    group_id: int,
+    user_ids: List[int],
+    db: Session = Depends(get_db),
+    shard_db: Session = Depends(get_group_db)
+):
+    """Add users to a group, replicating them onto the group's shard"""
+    db_group = get_group_or_404(shard_db, group_id)
+    users = get_directory_users(db, user_ids)
+
+    existing_member_ids = {m.id for m in db_group.members}
+    new_members = [u for u in users if u.id not in existing_member_ids]
+    if not new_members:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All users are already members of this group"
+        )
+
+    db_group.members.extend(replicate_users(db, shard_db, new_members))
+    shard_db.commit()
+    shard_db.refresh(db_group)
+    return db_group
+
+@router.post("/{group_id}/bills", response_model=BillResponse, status_code=status.HTTP_201_CREATED)
+def create_group_bill(
+    group_id: int,
+    bill: BillCreate,
+    db: Session = Depends(get_db),
+    shard_db: Session = Depends(get_group_db)
+):
+    """Create a bill owned by a group; creator and participants must be members"""
+    db_group = get_group_or_404(shard_db, group_id)
+    members = {m.id: m for m in db_group.members}
+    participant_ids = set(bill.participant_ids or [])
+    if bill.created_by not in members or not participant_ids <= members.keys():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Creator and participants must be members of the group"
+        )
+
+    db_bill = Bill(
+        title=bill.title,
+        total_amount=bill.total_amount,
+        currency=bill.currency,
+        created_by=bill.created_by,
+        group_id=group_id
+    )
+    if shard_db is not db:
+        # A shard's own ids would collide with other shards' bills
+        db_bill.id = shard_router.place_bill(db, shard_router.shard_for(db, group_id))
+    db_bill.participants.extend(members[user_id] for user_id in participant_ids)
+    shard_db.add(db_bill)
+    shard_db.commit()
+    shard_db.refresh(db_bill)
+    return db_bill
+
+@router.get("/{group_id}/bills", response_model=List[BillResponse])
+def get_group_bills(group_id: int, skip: int = 0, limit: int = 100, shard_db: Session = Depends(get_group_db)):
+    """Get a group's bills with pagination"""
+    get_group_or_404(shard_db, group_id)
+    return (
+        shard_db.query(Bill)
+        .filter(Bill.group_id == group_id)
+        .order_by(Bill.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
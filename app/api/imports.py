@@ -0,0 +1,251 @@
+import csv
+import io
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from uuid import uuid4
+
+import anyio
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+
+from app.core.bulk_load import ReceiveStreamReader, StreamAborted, allocate_ids, bulk_insert
+from app.core.database import engine, get_db
+from app.core.profiling import ProfiledRoute
+from app.models import User, Bill, Expense, bill_participants
+from app.models.schemas import ImportJobCreate, ImportJobResponse, ImportRowError, ImportStatus, SplitMethod
+
+router = APIRouter(prefix="/imports", tags=["imports"], route_class=ProfiledRoute)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 10_000           # rows validated and loaded per transaction
+STREAM_BUFFER_CHUNKS = 16     # request body chunks buffered ahead of the parser
+MAX_REPORTED_ERRORS = 1000
+MAX_TRACKED_JOBS = 1000
+
+HEADER_ALIASES = {
+    "date": {"date", "transaction date", "posted date", "posting date"},
+    "description": {"description", "merchant", "payee", "name", "memo"},
+    "amount": {"amount", "debit", "value"},
+}
+OPTIONAL_ALIASES = {
+    "currency": {"currency", "currency code"},
+}
+DATE_FORMATS = ("%m/%d/%Y", "%d.%m.%Y")
+CURRENCY_CODE = re.compile(r"[A-Z]{3}")  # Same rule as the schemas' currency pattern
+
+# Jobs are tracked in process memory, oldest evicted first
+import_jobs: "OrderedDict[str, ImportJobResponse]" = OrderedDict()
+
+Row = Tuple[datetime, str, float, str]
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> datetime:
+    """Statements repeat the same few dates, so parsed values are cached"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unrecognized date '{value}'")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def resolve_columns(header: List[str]) -> Dict[str, int]:
+    """Map the date/description/amount fields to their positions in the header"""
+    if not header:
+        raise ValueError("Statement is empty")
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in HEADER_ALIASES.items():
+        position = next((i for i, name in enumerate(names) if name in aliases), None)
+        if position is None:
+            raise ValueError(f"Statement header has no '{field}' column")
+        columns[field] = position
+    for field, aliases in OPTIONAL_ALIASES.items():
+        position = next((i for i, name in enumerate(names) if name in aliases), None)
+        if position is not None:
+            columns[field] = position
+    return columns
+
+
+def parse_row(row: List[str], columns: Dict[str, int], default_currency: str) -> Row:
+    try:
+        raw_date = row[columns["date"]].strip()
+        title = row[columns["description"]].strip()
+        raw_amount = row[columns["amount"]].strip()
+        # A blank currency cell falls back to the import's currency like a missing column
+        currency = (row[columns["currency"]].strip().upper() if "currency" in columns else "") or default_currency
+    except IndexError:
+        raise ValueError(f"Expected at least {max(columns.values()) + 1} columns, got {len(row)}")
+
+    if len(title) < 3:
+        raise ValueError("Description must be at least 3 characters")
+    try:
+        amount = float(raw_amount.replace(",", "").lstrip("$"))
+    except ValueError:
+        raise ValueError(f"Invalid amount '{raw_amount}'")
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError("Only debits with a positive amount can be imported")
+    if not CURRENCY_CODE.fullmatch(currency):
+        raise ValueError(f"Invalid currency '{currency}'")
+    return parse_date(raw_date), title, round(amount, 2), currency
+
+
+def load_chunk(user_id: int, rows: List[Row]) -> None:
+    """Insert one bill, participant link and fully paid expense per statement line"""
+    if not rows:
+        return
+    with engine.begin() as conn:
+        bill_ids = allocate_ids(conn, Bill.__table__, len(rows))
+        bulk_insert(
+            conn, Bill.__table__,
+            ("id", "title", "total_amount", "currency", "created_by", "created_at"),
+            [(bill_id, title, amount, currency, user_id, created_at)
+             for bill_id, (created_at, title, amount, currency) in zip(bill_ids, rows)]
+        )
+        bulk_insert(
+            conn, bill_participants,
+            ("bill_id", "user_id"),
+            [(bill_id, user_id) for bill_id in bill_ids]
+        )
+        bulk_insert(
+            conn, Expense.__table__,
+            ("bill_id", "user_id", "amount_owed", "amount_paid", "currency", "split_method", "created_at"),
+            [(bill_id, user_id, amount, amount, currency, SplitMethod.EXACT.value, created_at)
+             for bill_id, (created_at, _, amount, currency) in zip(bill_ids, rows)]
+        )
+
+
+def run_import(job: ImportJobResponse, reader: io.RawIOBase) -> None:
+    """Parse, validate and load a statement in chunks, recording progress on the job"""
+    started = time.perf_counter()
+    text_stream = io.TextIOWrapper(io.BufferedReader(reader, 1 << 16), encoding="utf-8-sig", newline="")
+    rows = csv.reader(text_stream)
+    rows_read = 0
+
+    def record_progress(loaded: int) -> None:
+        job.rows_read = rows_read
+        job.rows_imported += loaded
+        job.rows_per_second = round(rows_read / (time.perf_counter() - started), 1)
+
+    def fail(e: Exception) -> None:
+        # The chunk being parsed, including any cut-off last line, is never loaded
+        record_progress(0)
+        job.status = ImportStatus.FAILED
+        job.error = str(e)
+
+    try:
+        columns = resolve_columns(next(rows, None))
+        chunk: List[Row] = []
+        for row in rows:
+            if not row:
+                continue
+            rows_read += 1
+            try:
+                chunk.append(parse_row(row, columns, job.currency))
+            except ValueError as e:
+                job.rows_failed += 1
+                if len(job.errors) < MAX_REPORTED_ERRORS:
+                    job.errors.append(ImportRowError(line=rows.line_num, error=str(e)))
+            if len(chunk) >= CHUNK_SIZE:
+                load_chunk(job.user_id, chunk)
+                record_progress(len(chunk))
+                chunk = []
+        load_chunk(job.user_id, chunk)
+        record_progress(len(chunk))
+        job.status = ImportStatus.COMPLETED
+    except (ValueError, UnicodeDecodeError, csv.Error, SQLAlchemyError, StreamAborted) as e:
+        fail(e)
+    except Exception as e:
+        # Whatever went wrong, the job must not stay RUNNING and block re-uploads
+        logger.exception("Statement import %s failed", job.id)
+        fail(e)
+
+
+def get_job_or_404(job_id: str) -> ImportJobResponse:
+    job = import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    return job
+
+
+@router.post("/", response_model=ImportJobResponse, status_code=status.HTTP_201_CREATED)
+def create_import(job: ImportJobCreate, db: Session = Depends(get_db)):
+    """Create an import job; upload the statement to it next"""
+    user = db.query(User).filter(User.id == job.user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    import_job = ImportJobResponse(id=uuid4().hex, user_id=job.user_id, currency=job.currency)
+    import_jobs[import_job.id] = import_job
+    while len(import_jobs) > MAX_TRACKED_JOBS:
+        import_jobs.popitem(last=False)
+    return import_job
+
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+def get_import(job_id: str):
+    """Get the progress and row errors of an import"""
+    return get_job_or_404(job_id)
+
+
+@router.put("/{job_id}/statement", response_model=ImportJobResponse)
+async def upload_statement(job_id: str, request: Request):
+    """
+    Stream a CSV card or bank statement (raw request body) into bills and expenses
+
+    The header needs date, description and amount columns, and may have a currency
+    column (otherwise the import's currency is used). Every valid line becomes
+    a bill paid in full by the importing user. Progress is visible via GET /imports/{job_id}.
+    """
+    job = get_job_or_404(job_id)
+    if job.status != ImportStatus.PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Statement has already been uploaded for this import"
+        )
+    job.status = ImportStatus.RUNNING
+
+    send, receive = anyio.create_memory_object_stream(max_buffer_size=STREAM_BUFFER_CHUNKS)
+
+    async def pump_body():
+        async with send:
+            try:
+                try:
+                    async for chunk in request.stream():
+                        if chunk:
+                            await send.send(chunk)
+                except ClientDisconnect:
+                    # Not an end of file: the importer must fail, not load a cut-off line
+                    await send.send(StreamAborted("Client disconnected before the statement was fully uploaded"))
+            except anyio.BrokenResourceError:
+                pass  # the importer stopped reading after a fatal error
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(pump_body)
+        try:
+            await anyio.to_thread.run_sync(run_import, job, ReceiveStreamReader(receive))
+        finally:
+            receive.close()
+    return job
@@ -1,24 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.core.database import get_db
-from app.models.user import User
-from app.models.schemas import UserCreate, UserUpdate, UserResponse, UserResponseWithRelations
-from passlib.context import CryptContext
+from app.core.balances import expense_totals, grouped_expenses
+from app.core.config import settings
+from app.core.currency import get_rate_index
+from app.core.database import get_db, get_read_db
+from app.core.profiling import ProfiledRoute
+from app.core.purge import purge_deleted
+from app.core.security import active_users, hash_password
+from app.core.sharding import delete_user_copies, shard_router, update_user_copies
+from app.models import User, Expense
+from app.models.schemas import UserCreate, UserUpdate, UserResponse, UserResponseWithRelations, UserBalanceResponse
 
 
-router = APIRouter(prefix="/users", tags=["users"])
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+router = APIRouter(prefix="/users", tags=["users"], route_class=ProfiledRoute)
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    # Check if email already exists, including deleted accounts not yet purged
+    db_user = (
+        db.query(User)
+        .execution_options(include_deleted=True)
+        .filter(User.email == user.email)
+        .first()
+    )
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,12 +44,12 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 @router.get("/", response_model=List[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     users = db.query(User).offset(skip).limit(limit).all()
     return users
 
 @router.get("/{user_id}", response_model=UserResponseWithRelations)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
@@ -51,6 +58,33 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
         )
     return user
 
+@router.get("/{user_id}/balance", response_model=UserBalanceResponse)
+def get_user_balance(
+    user_id: int,
+    currency: str = Query(settings.REPORTING_CURRENCY, pattern=r"^[A-Za-z]{3}$"),
+    db: Session = Depends(get_read_db)
+):
+    """Get a user's totals across all bills, converted into the reporting currency"""
+    currency = currency.upper()
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    # Bills of groups on other shards keep their expenses there
+    groups = grouped_expenses(db, Expense.user_id == user_id)
+    for shard_id in range(1, shard_router.num_shards):
+        with shard_router.session(shard_id) as shard_db:
+            groups += grouped_expenses(shard_db, Expense.user_id == user_id)
+    try:
+        owed, paid = expense_totals(groups, currency, get_rate_index()).get(user_id, (0.0, 0.0))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return UserBalanceResponse(user_id=user_id, currency=currency, owed=owed, paid=paid, net=round(paid - owed, 2))
+
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.id == user_id).first()
@@ -62,22 +96,34 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     
     # Update only provided fields
     update_data = user_update.model_dump(exclude_unset=True)
+    if "password" in update_data:
+        update_data["password"] = hash_password(update_data["password"])
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     db.commit()
+    # Group shards hold copies of the user; keep them in step with the directory
+    update_user_copies(user_id, update_data)
     db.refresh(db_user)
     return db_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+def delete_user(user_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    query = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None))
+    if settings.SOFT_DELETE:
+        deleted = query.update({User.deleted_at: func.now()}, synchronize_session=False)
+        for shard_engine in shard_router.engines:
+            background_tasks.add_task(purge_deleted, bind=shard_engine)
+    else:
+        # Expenses and memberships cascade; created bills keep a NULL creator
+        deleted = query.delete(synchronize_session=False)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    db.delete(db_user)
     db.commit()
+    delete_user_copies(user_id)
+    active_users.pop(user_id)
     return None
\ No newline at end of file
@@ -0,0 +1,64 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import Date, func
+from sqlalchemy.orm import Session
+
+from app.core.currency import RateIndex
+from app.models import Expense
+
+# (user_id, currency, day, sum(amount_owed), sum(amount_paid))
+ExpenseGroup = Tuple[int, str, date, float, float]
+
+
+def grouped_expenses(db: Session, *criteria) -> List[ExpenseGroup]:
+    """Sum matching expenses per user, currency and day in the database.
+
+    Every expense in a group converts at the same rate, so the conversion only
+    has to touch one row per group instead of one per expense.
+    """
+    day = func.date(Expense.created_at, type_=Date)
+    return (
+        db.query(
+            Expense.user_id, Expense.currency, day,
+            func.sum(Expense.amount_owed), func.sum(Expense.amount_paid)
+        )
+        .filter(*criteria)
+        .group_by(Expense.user_id, Expense.currency, day)
+        .all()
+    )
+
+
+def expense_totals(groups: Sequence[ExpenseGroup], target: str, rates: RateIndex) -> Dict[int, Tuple[float, float]]:
+    """Owed and paid per user, converted into `target` with one factor per group"""
+    if not groups:
+        return {}
+    user_ids, currencies, days, owed, paid = zip(*groups)
+    factors = rates.factors(currencies, [day.toordinal() for day in days], target)
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for user_id, o, p, f in zip(user_ids, owed, paid, factors):
+        total = totals[user_id]
+        total[0] += o * f
+        total[1] += p * f
+    return {user_id: (round(o, 2), round(p, 2)) for user_id, (o, p) in totals.items()}
+
+
+def settle(nets: Dict[int, float]) -> List[Tuple[int, int, float]]:
+    """Greedy minimal set of (from_user, to_user, amount) transfers zeroing every net balance"""
+    creditors = sorted(((net, user_id) for user_id, net in nets.items() if net > 0.005), reverse=True)
+    debtors = sorted(((-net, user_id) for user_id, net in nets.items() if net < -0.005), reverse=True)
+    transfers = []
+    i = j = 0
+    while i < len(debtors) and j < len(creditors):
+        debt, debtor = debtors[i]
+        credit, creditor = creditors[j]
+        amount = min(debt, credit)
+        transfers.append((debtor, creditor, round(amount, 2)))
+        debtors[i] = (debt - amount, debtor)
+        creditors[j] = (credit - amount, creditor)
+        if debtors[i][0] <= 0.005:
+            i += 1
+        if creditors[j][0] <= 0.005:
+            j += 1
+    return transfers
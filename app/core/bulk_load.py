@@ -0,0 +1,89 @@
+import csv
+import io
+from typing import List, Sequence
+
+import anyio
+import anyio.from_thread
+from anyio.streams.memory import MemoryObjectReceiveStream
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+
+class StreamAborted(Exception):
+    """The sender gave up before the end of the stream, e.g. the client disconnected"""
+
+
+class ReceiveStreamReader(io.RawIOBase):
+    """Blocking file object over byte chunks sent from the event loop.
+
+    Lets a worker thread consume an async request body with the regular `csv`
+    module; memory stays bounded by the sending stream's buffer size. A sender
+    that can't finish sends a `StreamAborted` instead of closing the stream,
+    and reading raises it rather than reporting a truncated end of file.
+    """
+
+    def __init__(self, receive: MemoryObjectReceiveStream):
+        self._receive = receive
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                chunk = anyio.from_thread.run(self._receive.receive)
+            except anyio.EndOfStream:
+                return 0
+            if isinstance(chunk, StreamAborted):
+                raise chunk
+            self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def allocate_ids(conn: Connection, table: Table, count: int) -> List[int]:
+    """Reserve `count` primary keys so child rows can reference them before loading"""
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {"table": table.name, "count": count}
+        )
+        return [row[0] for row in rows]
+    # AUTOINCREMENT tables keep their high-water mark in sqlite_sequence, and
+    # SQLite never hands out an id at or below it, so bumping it reserves the range
+    params = {"table": table.name, "count": count}
+    bumped = conn.execute(
+        text("UPDATE sqlite_sequence SET seq = seq + :count WHERE name = :table"), params
+    ).rowcount
+    if not bumped:
+        conn.execute(
+            text(f"INSERT INTO sqlite_sequence (name, seq) SELECT :table, coalesce(max(id), 0) + :count FROM {table.name}"),
+            params
+        )
+    end = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = :table"), params).scalar()
+    return list(range(end - count + 1, end + 1))
+
+
+def bulk_insert(conn: Connection, table: Table, columns: Sequence[str], rows: Sequence[tuple]) -> None:
+    """Load rows with COPY on Postgres, executemany everywhere else"""
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        except conn.dialect.dbapi.Error as e:
+            # The raw cursor bypasses SQLAlchemy, so wrap driver errors like it would
+            raise DBAPIError.instance(statement, None, e, conn.dialect.dbapi.Error, dialect=conn.dialect) from e
+        finally:
+            cursor.close()
+    else:
+        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
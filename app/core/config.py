@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # Database
@@ -11,10 +11,40 @@ class Settings(BaseSettings):
     POSTGRES_DB: Optional[str] = None
     POSTGRES_PORT: Optional[str] = None
     
+    # Embedded SQLite mode, used when SQLITE_PATH is set and DATABASE_URL is not
+    SQLITE_PATH: Optional[str] = None
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_READ_POOL_SIZE: int = 8
+    
+    # Sharding: comma-separated URLs of extra group shards. The main database
+    # is always shard 0 and holds the global user directory and shard map.
+    SHARD_DATABASE_URLS: Optional[str] = None
+    
+    # Deletes: tombstone rows and purge them in the background in bounded batches
+    SOFT_DELETE: bool = False
+    PURGE_BATCH_SIZE: int = 1000
+    
+    # Profiling: fraction of requests to profile, and a token that forces it
+    # via the X-Profile-Token header. Both off by default.
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_DIR: str = "profiles"
+    
+    # Currencies: local exchange-rate CSV (date,currency,rate) and the default
+    # currency balances are reported in
+    EXCHANGE_RATES_FILE: Optional[str] = None
+    REPORTING_CURRENCY: str = "USD"
+    
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 60
     
     # App
     app_name: str = "Expense Splitting API"
@@ -25,8 +55,20 @@ class Settings(BaseSettings):
         """Build database URL from components or use direct URL"""
         if self.DATABASE_URL:
             return self.DATABASE_URL
+        if self.SQLITE_PATH:
+            return f"sqlite:///{self.SQLITE_PATH}"
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @property
+    def is_sqlite(self) -> bool:
+        return self.database_url.startswith("sqlite")
+    
+    @property
+    def shard_urls(self) -> List[str]:
+        """Database URLs of all shards, the main database first"""
+        extra = [url.strip() for url in (self.SHARD_DATABASE_URLS or "").split(",") if url.strip()]
+        return [self.database_url] + extra
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,81 @@
+"""Exchange rates loaded from a local file, indexed in memory for batched conversion.
+
+The rates file is a CSV with `date,currency,rate` columns, where `rate` is the
+number of units of `currency` per unit of a common base currency (e.g. the ECB
+reference rates, base EUR). No network calls are ever made. A conversion on a
+given day uses the latest rate published on or before that day.
+"""
+import csv
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.core.config import settings
+
+
+class RateIndex:
+    def __init__(self, rates: Iterable[Tuple[date, str, float]]):
+        by_currency: Dict[str, List[Tuple[int, float]]] = {}
+        for day, currency, rate in rates:
+            by_currency.setdefault(currency.upper(), []).append((day.toordinal(), rate))
+        # currency -> (sorted day ordinals, rates in the same order)
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+        for currency, points in by_currency.items():
+            points.sort()
+            self._series[currency] = ([d for d, _ in points], [r for _, r in points])
+
+    @classmethod
+    def from_csv(cls, path: str) -> "RateIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(
+                (date.fromisoformat(row["date"]), row["currency"], float(row["rate"]))
+                for row in csv.DictReader(f)
+            )
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted(self._series)
+
+    def rate(self, currency: str, day: int) -> float:
+        """Units of `currency` per base unit on the day with ordinal `day`"""
+        series = self._series.get(currency)
+        if series is None:
+            raise ValueError(f"No exchange rates loaded for {currency}")
+        days, rates = series
+        i = bisect_right(days, day)
+        if i == 0:
+            raise ValueError(f"No {currency} exchange rate on or before {date.fromordinal(day)}")
+        return rates[i - 1]
+
+    def factor(self, source: str, target: str, day: int) -> float:
+        if source == target:
+            return 1.0
+        return self.rate(target, day) / self.rate(source, day)
+
+    def factors(self, currencies: Sequence[str], days: Sequence[int], target: str) -> List[float]:
+        """Conversion factor into `target` for every (currency, day ordinal) row.
+
+        Rows share few distinct (currency, day) pairs, so each pair is looked up
+        once and the per-row work is a dict hit.
+        """
+        cache: Dict[Tuple[str, int], float] = {}
+        cached = cache.get
+
+        def lookup(key: Tuple[str, int]) -> float:
+            value = cache[key] = self.factor(key[0], target, key[1])
+            return value
+
+        # Factors are never 0, so `or` safely falls through to the lookup on a miss
+        return [cached(key) or lookup(key) for key in zip(currencies, days)]
+
+    def convert(self, amounts: Sequence[float], currencies: Sequence[str], days: Sequence[int], target: str) -> List[float]:
+        return [a * f for a, f in zip(amounts, self.factors(currencies, days, target))]
+
+
+@lru_cache(maxsize=1)
+def get_rate_index() -> RateIndex:
+    """The process-wide rate index, loaded from EXCHANGE_RATES_FILE on first use"""
+    if not settings.EXCHANGE_RATES_FILE:
+        return RateIndex([])
+    return RateIndex.from_csv(settings.EXCHANGE_RATES_FILE)
@@ -1,17 +1,79 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Column, DateTime, create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, with_loader_criteria
 from app.core.config import settings
 
-DATABASE_URL = settings.DATABASE_URL
+DATABASE_URL = settings.database_url
 
-engine = create_engine(DATABASE_URL)
+def set_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    """Tune a new SQLite connection; WAL lets readers run alongside the writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+def create_database_engine(url: str, read_only: bool = False) -> Engine:
+    """Create an engine, tuned for SQLite when the URL points at a database file.
+
+    A SQLite writer engine holds a single connection so writes are serialized in
+    the pool instead of contending for the database lock; readers get a pool.
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(url)
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.SQLITE_READ_POOL_SIZE if read_only else 1,
+        max_overflow=0
+    )
+    event.listen(sqlite_engine, "connect", lambda conn, _: set_sqlite_pragmas(conn, read_only))
+    return sqlite_engine
+
+engine = create_database_engine(DATABASE_URL)
+read_engine = create_database_engine(DATABASE_URL, read_only=True) if settings.is_sqlite else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+class SoftDeleteMixin:
+    """Tombstone column; rows with deleted_at set are hidden from ORM queries"""
+    deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+@event.listens_for(Session, "do_orm_execute")
+def hide_soft_deleted(execute_state):
+    """Filter tombstoned rows out of every ORM select, including relationship loads.
+
+    Pass `execution_options(include_deleted=True)` to see them anyway.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Session for read-only endpoints; served by the reader pool in SQLite mode"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,172 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.sharding import shard_router
+from app.models import User, Bill, BillShardMapping, Expense, bill_participants
+
+MODELS = {"users": User, "bills": Bill, "expenses": Expense}
+
+# (entity, relation) -> (target entity, kind, spec)
+#   forward:   the parent holds the foreign key attribute named by spec
+#   reverse:   the target's foreign key column spec points at the parent
+#   secondary: spec is (parent column, target column) of an association table
+RELATIONS = {
+    ("users", "bills"): ("bills", "secondary", (bill_participants.c.user_id, bill_participants.c.bill_id)),
+    ("users", "created_bills"): ("bills", "reverse", Bill.created_by),
+    ("bills", "participants"): ("users", "secondary", (bill_participants.c.bill_id, bill_participants.c.user_id)),
+    ("bills", "expenses"): ("expenses", "reverse", Expense.bill_id),
+    ("bills", "created_by_user"): ("users", "forward", "created_by"),
+    ("expenses", "bill"): ("bills", "forward", "bill_id"),
+    ("expenses", "user"): ("users", "forward", "user_id"),
+}
+
+MAX_PATH_DEPTH = 4
+
+
+def unique(ids: Iterable[int]) -> List[int]:
+    return list(dict.fromkeys(ids))
+
+
+class BatchLoader:
+    """Request-scoped loader that coalesces lookups into one IN query per step.
+
+    Entities are cached by id for the life of the request, and to-many relations
+    are cached per parent, so overlapping include paths never query the same
+    rows twice and every entity appears once in the response graph.
+
+    With group shards configured, each step runs one IN query per shard involved.
+    Users come from the directory (shard 0). Bills are routed through
+    `bill_shard_map`. A bill, expense or participant link found on a shard is
+    kept only if its bill belongs to that shard.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.sessions: Dict[int, Session] = {0: db}
+        # bill id -> owning shard, filled from the directory as bills come up
+        self.bill_shards: Dict[int, int] = {}
+        # id -> instance, or None once known to be missing (or soft-deleted)
+        self.entities: Dict[str, Dict[int, Optional[object]]] = {name: {} for name in MODELS}
+        # (entity, relation) -> parent id -> child ids
+        self.links: Dict[Tuple[str, str], Dict[int, List[int]]] = {}
+
+    def session(self, shard_id: int) -> Session:
+        if shard_id not in self.sessions:
+            self.sessions[shard_id] = shard_router.session(shard_id)
+        return self.sessions[shard_id]
+
+    def close(self) -> None:
+        """Close the shard sessions this loader opened; `db` belongs to the caller"""
+        for shard_id, session in self.sessions.items():
+            if shard_id != 0:
+                session.close()
+
+    def locate_bills(self, bill_ids: Iterable[int]) -> None:
+        """Record the owning shard of each bill id, one directory query for the unknown ones"""
+        unknown = [i for i in unique(bill_ids) if i not in self.bill_shards]
+        if not unknown:
+            return
+        if shard_router.num_shards > 1:
+            mappings = self.db.query(BillShardMapping).filter(BillShardMapping.bill_id.in_(unknown))
+            self.bill_shards.update((m.bill_id, m.shard_id) for m in mappings)
+        for i in unknown:
+            self.bill_shards.setdefault(i, 0)
+
+    def shards_for(self, entity: str, ids: List[int]) -> Dict[int, List[int]]:
+        """Shards to search for these entities' rows or relations, with the ids to look for on each"""
+        if shard_router.num_shards == 1:
+            return {0: ids}
+        if entity == "bills":
+            self.locate_bills(ids)
+            by_shard = defaultdict(list)
+            for i in ids:
+                by_shard[self.bill_shards[i]].append(i)
+            return by_shard
+        # Expense ids carry no placement, and users have copies and bills on every shard
+        return {shard_id: ids for shard_id in range(shard_router.num_shards)}
+
+    def owned(self, shard_id: int, bill_ids: List[int]) -> List[bool]:
+        """Whether each bill id belongs to `shard_id`, so stray rows on other shards are ignored"""
+        self.locate_bills(bill_ids)
+        return [self.bill_shards[i] == shard_id for i in bill_ids]
+
+    def load(self, entity: str, ids: Iterable[int]) -> List[int]:
+        """Load entities by id, querying only the ids not seen yet; returns the found ids"""
+        ids = unique(ids)
+        cache = self.entities[entity]
+        wanted = [i for i in ids if i not in cache]
+        if wanted:
+            model = MODELS[entity]
+            # The directory is the source of truth for users; shards only hold copies
+            shards = {0: wanted} if entity == "users" else self.shards_for(entity, wanted)
+            for shard_id, shard_ids in shards.items():
+                objs = self.session(shard_id).query(model).filter(model.id.in_(shard_ids)).all()
+                if entity != "users":
+                    owners = self.owned(shard_id, [obj.id if entity == "bills" else obj.bill_id for obj in objs])
+                    objs = [obj for obj, owned in zip(objs, owners) if owned]
+                for obj in objs:
+                    cache[obj.id] = obj
+            for i in wanted:
+                cache.setdefault(i, None)
+        return [i for i in ids if cache[i] is not None]
+
+    def follow(self, entity: str, relation: str, parent_ids: List[int]) -> List[int]:
+        """Resolve one relation for all parents at once; returns the child ids"""
+        target, kind, spec = RELATIONS[(entity, relation)]
+        parents = self.entities[entity]
+        if kind == "forward":
+            values = (getattr(parents[p], spec) for p in parent_ids)
+            return self.load(target, (v for v in values if v is not None))
+
+        links = self.links.setdefault((entity, relation), {})
+        pending = [p for p in parent_ids if p not in links]
+        if pending:
+            for p in pending:
+                links[p] = []
+            shards = self.shards_for(entity, pending)
+            if kind == "reverse":
+                model = MODELS[target]
+                for shard_id, shard_pending in shards.items():
+                    objs = self.session(shard_id).query(model).filter(spec.in_(shard_pending)).order_by(model.id).all()
+                    owners = self.owned(shard_id, [obj.id if target == "bills" else obj.bill_id for obj in objs])
+                    for obj, owned in zip(objs, owners):
+                        if owned:
+                            self.entities[target][obj.id] = obj
+                            links[getattr(obj, spec.key)].append(obj.id)
+                for p in pending:
+                    links[p].sort()
+            else:
+                parent_column, target_column = spec
+                for shard_id, shard_pending in shards.items():
+                    rows = self.session(shard_id).execute(
+                        select(parent_column, target_column).where(parent_column.in_(shard_pending))
+                    ).all()
+                    owners = self.owned(shard_id, [row[0] if entity == "bills" else row[1] for row in rows])
+                    for (parent_id, child_id), owned in zip(rows, owners):
+                        if owned:
+                            links[parent_id].append(child_id)
+                self.load(target, (c for p in pending for c in links[p]))
+
+        targets = self.entities[target]
+        child_ids = []
+        for p in parent_ids:
+            links[p] = [c for c in unique(links[p]) if targets.get(c) is not None]
+            child_ids.extend(links[p])
+        return unique(child_ids)
+
+    def resolve(self, path: str, roots: Dict[str, List[int]]) -> None:
+        """Walk an include path such as "users.bills.expenses" from the root ids"""
+        entity, *relations = path.split(".")
+        if entity not in MODELS:
+            raise ValueError(f"Unknown entity '{entity}' in include path '{path}'")
+        if len(relations) > MAX_PATH_DEPTH:
+            raise ValueError(f"Include path '{path}' is deeper than {MAX_PATH_DEPTH} relations")
+        ids = self.load(entity, roots.get(entity, []))
+        for relation in relations:
+            if (entity, relation) not in RELATIONS:
+                raise ValueError(f"Unknown relation '{relation}' on {entity} in include path '{path}'")
+            ids = self.follow(entity, relation, ids)
+            entity = RELATIONS[(entity, relation)][0]
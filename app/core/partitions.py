@@ -0,0 +1,108 @@
+"""Maintenance of the monthly range partitions of the Postgres `expenses` table.
+
+Usage:
+    python -m app.core.partitions ensure --months-ahead 3
+    python -m app.core.partitions archive --before 2025-01-01
+"""
+import argparse
+import re
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.database import engine
+
+PARENT_TABLE = "expenses"
+ARCHIVE_SCHEMA = "archive"
+PARTITION_NAME = re.compile(r"^expenses_y(\d{4})m(\d{2})$")
+
+
+def add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month:%Y}m{month:%m}"
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Names of the monthly partitions currently attached to expenses"""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE})
+    return sorted(name for (name,) in rows if PARTITION_NAME.match(name))
+
+
+def ensure_partitions(conn: Connection, months_ahead: int = 3) -> List[str]:
+    """Create any missing monthly partitions from this month up to `months_ahead`.
+
+    Partitions must exist before rows for their month arrive; otherwise rows land
+    in expenses_default and the month can no longer be attached without moving them.
+    """
+    created = []
+    existing = set(list_partitions(conn))
+    month = date.today().replace(day=1)
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        if name not in existing:
+            upper = add_months(month, 1)
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def archive_partitions(conn: Connection, before: date) -> List[str]:
+    """Detach every monthly partition that ends on or before `before`.
+
+    Detached partitions are moved to the archive schema, where they stay queryable
+    (or can be dumped and dropped) without being scanned by queries on expenses.
+    """
+    archived = []
+    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    for name in list_partitions(conn):
+        year, month = map(int, PARTITION_NAME.match(name).groups())
+        if add_months(date(year, month, 1), 1) > before:
+            continue
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        archived.append(name)
+    return archived
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Manage expenses table partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+
+    archive = commands.add_parser("archive", help="detach cold partitions into the archive schema")
+    archive.add_argument("--before", type=date.fromisoformat, required=True,
+                         help="archive partitions whose month ends on or before this date (YYYY-MM-DD)")
+
+    args = parser.parse_args(argv)
+    if engine.dialect.name != "postgresql":
+        parser.error("expenses is only partitioned on PostgreSQL")
+
+    with engine.begin() as conn:
+        if args.command == "ensure":
+            names = ensure_partitions(conn, args.months_ahead)
+            print(f"Created {len(names)} partition(s): {', '.join(names) or '-'}")
+        else:
+            names = archive_partitions(conn, args.before)
+            print(f"Archived {len(names)} partition(s): {', '.join(names) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
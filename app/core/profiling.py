@@ -0,0 +1,184 @@
+"""On-demand request profiling.
+
+A sampled fraction of requests (PROFILING_SAMPLE_RATE), plus any request carrying
+the `X-Profile-Token` header matching PROFILING_TOKEN, is profiled with the
+pyinstrument sampling profiler. Each profile is written to PROFILING_DIR as a
+speedscope file (open it at https://www.speedscope.app) with the route, status,
+wall time and every SQL query's duration attached under "x-request".
+
+When profiling is disabled nothing is installed: routes are not wrapped, no
+middleware runs and no SQLAlchemy listeners are registered.
+"""
+import functools
+import hmac
+import inspect
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import anyio.to_thread
+from fastapi import FastAPI, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # optional dependency; profiles then only carry query timings
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+
+
+def profiling_enabled() -> bool:
+    return settings.PROFILING_SAMPLE_RATE > 0 or bool(settings.PROFILING_TOKEN)
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.queries: List[dict] = []
+        self.session = None  # pyinstrument session of the endpoint's worker thread
+
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar("active_profile", default=None)
+
+
+class ProfiledRoute(APIRoute):
+    """Runs sync endpoints, and validation of their response model, under the profiler.
+
+    FastAPI calls sync endpoints in a worker thread and pyinstrument samples only
+    the thread it was started on, so the profiler has to start inside the endpoint.
+    Response validation is done there too so lazy loads during serialization are
+    attributed to the request.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        wrap = profiling_enabled() and Profiler and not inspect.iscoroutinefunction(endpoint) \
+            and not getattr(endpoint, "__profiled__", False)
+        if wrap:
+            endpoint = self._wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+        # Built once per route: a schema build per request would dominate the profile
+        self.response_adapter = TypeAdapter(self.response_model) \
+            if wrap and self.response_model is not None else None
+
+    def _wrap(self, endpoint):
+        @functools.wraps(endpoint)
+        def profiled_endpoint(*args, **kwargs):
+            profile = _active_profile.get()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            profiler = Profiler(interval=settings.PROFILING_INTERVAL)
+            profiler.start()
+            try:
+                result = endpoint(*args, **kwargs)
+                if self.response_adapter is not None and not isinstance(result, Response):
+                    self.response_adapter.validate_python(result, from_attributes=True)
+                return result
+            finally:
+                profile.session = profiler.stop()
+
+        profiled_endpoint.__profiled__ = True
+        return profiled_endpoint
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware choosing which requests to profile and writing the result"""
+
+    def __init__(self, app):
+        self.app = app
+        self.directory = Path(settings.PROFILING_DIR)
+        self.token = settings.PROFILING_TOKEN.encode() if settings.PROFILING_TOKEN else None
+
+    def should_profile(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - profile.started) * 1000
+            route = getattr(scope.get("route"), "path", profile.path)
+            await anyio.to_thread.run_sync(self.write_profile, profile, route, status_code, elapsed_ms)
+
+    def write_profile(self, profile: RequestProfile, route: str, status_code: int, elapsed_ms: float) -> None:
+        name = f"{profile.method} {route}"
+        document = json.loads(SpeedscopeRenderer().render(profile.session)) if profile.session else {}
+        document["name"] = name
+        document["x-request"] = {
+            "method": profile.method,
+            "route": route,
+            "path": profile.path,
+            "status": status_code,
+            "duration_ms": round(elapsed_ms, 3),
+            "query_count": len(profile.queries),
+            "query_ms": round(sum(q["duration_ms"] for q in profile.queries), 3),
+            "queries": profile.queries,
+        }
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{stamp}-{slug}.speedscope.json").write_text(json.dumps(document))
+        except OSError:
+            logger.exception("Could not write request profile for %s", name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None and conn.info.get("profile_query_start"):
+        started = conn.info["profile_query_start"].pop()
+        profile.queries.append({
+            "statement": statement,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        })
+
+
+def install_profiling(app: FastAPI) -> None:
+    """Add the profiling middleware and SQL timing listeners if profiling is enabled"""
+    if not profiling_enabled():
+        return
+    if Profiler is None:
+        logger.warning("pyinstrument is not installed; request profiles will only contain query timings")
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_middleware(ProfilingMiddleware)
@@ -0,0 +1,64 @@
+"""Hard-deletes soft-deleted (tombstoned) rows in small batches.
+
+Every batch is its own short transaction, so purging a user with tens of
+thousands of expenses never holds long locks. Run it from a cron job with
+`python -m app.core.purge`, or let the delete endpoints schedule it.
+"""
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import ColumnElement
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.sharding import shard_router
+from app.models import User, Bill, Expense, bill_participants, group_members
+
+users = User.__table__
+bills = Bill.__table__
+expenses = Expense.__table__
+
+
+def purge_in_batches(table, key_columns, condition: ColumnElement, batch_size: int, bind: Engine = engine) -> int:
+    """Delete rows matching `condition` at most `batch_size` keys per transaction"""
+    total = 0
+    while True:
+        batch = select(*key_columns).where(condition).limit(batch_size)
+        with bind.begin() as conn:
+            deleted = conn.execute(delete(table).where(tuple_(*key_columns).in_(batch))).rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def purge_deleted(batch_size: int = settings.PURGE_BATCH_SIZE, bind: Engine = engine) -> int:
+    """Purge tombstoned users, bills and expenses, children before parents.
+
+    Children are removed in batches first so the final parent deletes have
+    nothing left to cascade to. `bind` selects the database (e.g. a group
+    shard). Returns the number of rows deleted.
+    """
+    deleted_bills = select(bills.c.id).where(bills.c.deleted_at.isnot(None))
+    deleted_users = select(users.c.id).where(users.c.deleted_at.isnot(None))
+
+    steps = [
+        (expenses, [expenses.c.id], expenses.c.deleted_at.isnot(None)),
+        (expenses, [expenses.c.id], expenses.c.bill_id.in_(deleted_bills)),
+        (expenses, [expenses.c.id], expenses.c.user_id.in_(deleted_users)),
+        (bill_participants, [bill_participants.c.bill_id, bill_participants.c.user_id],
+         bill_participants.c.bill_id.in_(deleted_bills)),
+        (bill_participants, [bill_participants.c.bill_id, bill_participants.c.user_id],
+         bill_participants.c.user_id.in_(deleted_users)),
+        (group_members, [group_members.c.group_id, group_members.c.user_id],
+         group_members.c.user_id.in_(deleted_users)),
+        (bills, [bills.c.id], bills.c.deleted_at.isnot(None)),
+        (users, [users.c.id], users.c.deleted_at.isnot(None)),
+    ]
+    return sum(
+        purge_in_batches(table, key_columns, condition, batch_size, bind)
+        for table, key_columns, condition in steps
+    )
+
+
+if __name__ == "__main__":
+    purged = sum(purge_deleted(bind=shard_engine) for shard_engine in shard_router.engines)
+    print(f"Purged {purged} row(s) across {shard_router.num_shards} shard(s)")
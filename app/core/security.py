@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import uuid4
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.models import User
+from app.models.schemas import Principal
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_password(password: str, hashed: Optional[str]) -> bool:
+    if hashed is None:
+        # Burn the same time as a real check so unknown emails can't be probed
+        pwd_context.dummy_verify()
+        return False
+    return pwd_context.verify(password, hashed)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[object, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class TokenDenylist:
+    """Revoked token ids, each kept only until the token would have expired anyway"""
+
+    def __init__(self):
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._revoked = {k: exp for k, exp in self._revoked.items() if exp > now}
+            self._revoked[bytes.fromhex(jti)] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        if not self._revoked:
+            return False
+        try:
+            return bytes.fromhex(jti) in self._revoked
+        except ValueError:
+            return True
+
+
+# is_active per user id; the only state a token can't carry
+active_users = TTLCache(settings.AUTH_PRINCIPAL_CACHE_SIZE, settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+denylist = TokenDenylist()
+
+CREDENTIALS_ERROR = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def create_access_token(user) -> str:
+    """Issue a token carrying every claim needed to authenticate without the database"""
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "iat": now,
+        "exp": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        "jti": uuid4().hex,
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def decode_access_token(token: str) -> dict:
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise CREDENTIALS_ERROR
+    if "sub" not in claims or "jti" not in claims or denylist.is_revoked(claims["jti"]):
+        raise CREDENTIALS_ERROR
+    return claims
+
+def is_user_active(user_id: int) -> bool:
+    """Cached is_active lookup; only a cache miss touches the database"""
+    active = active_users.get(user_id)
+    if active is None:
+        with ReadSessionLocal() as db:
+            user = db.query(User.is_active).filter(User.id == user_id).first()
+        active = bool(user and user.is_active)
+        active_users.set(user_id, active)
+    return active
+
+def get_current_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    return decode_access_token(token)
+
+def get_current_principal(claims: dict = Depends(get_current_claims)) -> Principal:
+    """Authenticated user built from token claims"""
+    user_id = int(claims["sub"])
+    if not is_user_active(user_id):
+        raise CREDENTIALS_ERROR
+    return Principal(id=user_id, email=claims.get("email"), name=claims.get("name"))
@@ -0,0 +1,194 @@
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.bulk_load import allocate_ids
+from app.core.config import settings
+from app.core.database import engine, create_database_engine, get_db, get_read_db
+from app.models import Bill, BillShardMapping, Expense, ShardMapping, User
+
+
+class ShardRouter:
+    """Routes each group's sessions to the database shard that owns it.
+
+    Shard 0 is the main database. Besides being a regular shard it holds the
+    global directory: the `shard_map` table (group id -> shard), the
+    `bill_shard_map` table (bill id -> shard, for bills off shard 0) and the
+    `users` table that every other shard replicates rows from on demand.
+
+    Bill and expense ids on the other shards are reserved from the main
+    database's sequences, so an id names the same row wherever it is used.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines = [engine] + [create_database_engine(url) for url in urls[1:]]
+        self.sessionmakers = [
+            sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+            for shard_engine in self.engines
+        ]
+        # Placements never change once assigned, so they can be cached forever
+        self._placements: Dict[int, int] = {}
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.engines)
+
+    def session(self, shard_id: int) -> Session:
+        return self.sessionmakers[shard_id]()
+
+    def shard_for(self, directory: Session, group_id: int) -> Optional[int]:
+        """Look up which shard owns a group, or None if the group does not exist"""
+        shard_id = self._placements.get(group_id)
+        if shard_id is None:
+            mapping = directory.get(ShardMapping, group_id)
+            if mapping is None:
+                return None
+            shard_id = self._placements[group_id] = mapping.shard_id
+        return shard_id
+
+    def place_group(self, directory: Session) -> ShardMapping:
+        """Allocate a new global group id on the least loaded shard.
+
+        The mapping is flushed but not committed; the caller commits it once
+        the group row exists on its shard.
+        """
+        counts = Counter(dict(
+            directory.query(ShardMapping.shard_id, func.count(ShardMapping.group_id))
+            .group_by(ShardMapping.shard_id)
+            .all()
+        ))
+        shard_id = min(range(self.num_shards), key=lambda shard: counts[shard])
+        mapping = ShardMapping(shard_id=shard_id)
+        directory.add(mapping)
+        directory.flush()
+        return mapping
+
+    def shard_for_bill(self, directory: Session, bill_id: int) -> int:
+        """Look up which shard owns a bill; bills without a placement live on shard 0"""
+        mapping = directory.get(BillShardMapping, bill_id)
+        return mapping.shard_id if mapping else 0
+
+    def reserve_ids(self, directory: Session, model, count: int) -> List[int]:
+        """Reserve `count` ids from the directory's sequence for rows stored on another shard.
+
+        Committed straight away so an id is never handed out twice; one whose
+        row never gets written just leaves a gap.
+        """
+        ids = allocate_ids(directory.connection(), model.__table__, count)
+        directory.commit()
+        return ids
+
+    def place_bill(self, directory: Session, shard_id: int) -> int:
+        """Reserve a global bill id on a shard other than 0 and record the placement"""
+        bill_id = allocate_ids(directory.connection(), Bill.__table__, 1)[0]
+        directory.add(BillShardMapping(bill_id=bill_id, shard_id=shard_id))
+        # Published before the bill exists: until then the id simply 404s
+        directory.commit()
+        return bill_id
+
+
+def replicate_users(directory: Session, shard: Session, users: List[User]) -> List[User]:
+    """Return shard-local copies of directory users, copying missing rows over.
+
+    Bills and group memberships reference users by foreign key, so a user has to
+    exist on a group's shard before joining it. The copy keeps the global id.
+    """
+    if shard is directory:
+        return users
+    ids = [user.id for user in users]
+    local = {user.id: user for user in shard.query(User).filter(User.id.in_(ids)).all()}
+    for user in users:
+        if user.id not in local:
+            local[user.id] = User(
+                id=user.id,
+                name=user.name,
+                email=user.email,
+                password=user.password,
+                is_active=user.is_active
+            )
+            shard.add(local[user.id])
+    return [local[user_id] for user_id in ids]
+
+
+def update_user_copies(user_id: int, values: dict) -> None:
+    """Apply a directory user's changes to its copies on the other shards"""
+    if not values:
+        return
+    for shard_id in range(1, shard_router.num_shards):
+        with shard_router.session(shard_id) as shard:
+            shard.query(User).filter(User.id == user_id).update(values, synchronize_session=False)
+            shard.commit()
+
+
+def delete_user_copies(user_id: int) -> None:
+    """Delete (or tombstone, in soft-delete mode) a directory user's copies on the other shards"""
+    for shard_id in range(1, shard_router.num_shards):
+        with shard_router.session(shard_id) as shard:
+            query = shard.query(User).filter(User.id == user_id, User.deleted_at.is_(None))
+            if settings.SOFT_DELETE:
+                query.update({User.deleted_at: func.now()}, synchronize_session=False)
+            else:
+                # Memberships and expenses cascade on the shard as they do in the directory
+                query.delete(synchronize_session=False)
+            shard.commit()
+
+
+shard_router = ShardRouter(settings.shard_urls)
+
+
+@contextmanager
+def bill_session(directory: Session, bill_id: int) -> Iterator[Session]:
+    """Session on the shard that owns a bill; `directory` itself for shard 0"""
+    shard_id = shard_router.shard_for_bill(directory, bill_id)
+    if shard_id == 0:
+        yield directory
+        return
+    shard = shard_router.session(shard_id)
+    try:
+        yield shard
+    finally:
+        shard.close()
+
+
+@contextmanager
+def expense_session(directory: Session, expense_id: int) -> Iterator[Session]:
+    """Session on the shard holding an expense; `directory` itself if none does.
+
+    Expense ids are unique across shards, so the owner is the only shard with the row.
+    """
+    if directory.query(Expense.id).filter(Expense.id == expense_id).first():
+        yield directory
+        return
+    for shard_id in range(1, shard_router.num_shards):
+        shard = shard_router.session(shard_id)
+        try:
+            if shard.query(Expense.id).filter(Expense.id == expense_id).first():
+                yield shard
+                return
+        finally:
+            shard.close()
+    yield directory
+
+
+def get_bill_db(bill_id: int, db: Session = Depends(get_db)):
+    with bill_session(db, bill_id) as bill_db:
+        yield bill_db
+
+
+def get_bill_read_db(bill_id: int, db: Session = Depends(get_read_db)):
+    with bill_session(db, bill_id) as bill_db:
+        yield bill_db
+
+
+def get_expense_db(expense_id: int, db: Session = Depends(get_db)):
+    with expense_session(db, expense_id) as expense_db:
+        yield expense_db
+
+
+def get_expense_read_db(expense_id: int, db: Session = Depends(get_read_db)):
+    with expense_session(db, expense_id) as expense_db:
+        yield expense_db
@@ -0,0 +1,135 @@
+"""Single-flight coalescing of concurrent identical bill reads.
+
+While a GET for a bill (or its expenses) is executing, identical requests (same
+path, query parameters and Authorization header) wait for it and are answered
+with the same status, headers and body instead of running their own queries.
+
+Any mutating request naming a bill detaches that bill's in-flight reads, both
+when it starts and when it finishes, so nobody arriving after a write joins a
+read that began before it. Other writes that can change a bill response but
+can't be tied to a single bill (for example `PUT /expenses/{id}` or a user
+update) detach every in-flight read. Writes that can't affect a bill response,
+such as logins or `POST /batch/`, detach nothing.
+"""
+import asyncio
+import re
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+API_PREFIX = "/api/v1"
+BILL_READ = re.compile(rf"^{API_PREFIX}/(?:bills|expenses/bill)/(\d+)/?$")
+BILL_PATH = re.compile(rf"^{API_PREFIX}/(?:bills|expenses/bill)/(\d+)(?:/|$)")
+# Writes that can change bill responses without naming the bill in their path
+ANY_BILL_WRITE = re.compile(
+    rf"^{API_PREFIX}/(?:bills/?|expenses(?:/.*)?|groups/\d+/bills/?|imports/[^/]+/statement/?|users/\d+/?)$"
+)
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+FlightKey = Tuple[str, str, bytes]
+CapturedResponse = Tuple[dict, bytes]
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[FlightKey, asyncio.Task] = {}
+        self._by_bill: Dict[int, Set[FlightKey]] = defaultdict(set)
+        self.leaders = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def do(self, key: FlightKey, bill_id: int, fn) -> CapturedResponse:
+        """Run `fn` once for all concurrent callers with the same key"""
+        task = self._flights.get(key)
+        if task is None:
+            self.leaders += 1
+            # A task of its own, so a waiter going away never cancels the others' result
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            self._by_bill[bill_id].add(key)
+            task.add_done_callback(lambda _: self._detach(key, bill_id, task))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _detach(self, key: FlightKey, bill_id: int, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+            keys = self._by_bill.get(bill_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_bill[bill_id]
+
+    def forget(self, bill_id: Optional[int] = None) -> None:
+        """Stop new requests joining reads of one bill, or of every bill if None"""
+        if bill_id is None:
+            keys = list(self._flights)
+            self._by_bill.clear()
+        else:
+            keys = self._by_bill.pop(bill_id, ())
+        detached = [key for key in keys if self._flights.pop(key, None) is not None]
+        if detached:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "in_flight": len(self._flights),
+        }
+
+
+singleflight = SingleFlight()
+
+
+class SingleFlightMiddleware:
+    """Pure ASGI middleware applying `singleflight` to bill reads and invalidating on writes"""
+
+    def __init__(self, app, flights: SingleFlight = singleflight):
+        self.app = app
+        self.flights = flights
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] not in SAFE_METHODS:
+            match = BILL_PATH.match(scope["path"])
+            if match is None and not ANY_BILL_WRITE.match(scope["path"]):
+                await self.app(scope, receive, send)
+                return
+            bill_id = int(match.group(1)) if match else None
+            self.flights.forget(bill_id)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.flights.forget(bill_id)
+            return
+
+        match = BILL_READ.match(scope["path"]) if scope["method"] == "GET" else None
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        auth = next((value for name, value in scope["headers"] if name == b"authorization"), b"")
+        key = (scope["path"], query, auth)
+
+        async def run() -> CapturedResponse:
+            start, body = {}, []
+
+            async def capture(message):
+                if message["type"] == "http.response.start":
+                    start.update(message)
+                elif message["type"] == "http.response.body":
+                    body.append(message.get("body", b""))
+
+            await self.app(scope, receive, capture)
+            return start, b"".join(body)
+
+        start, body = await self.flights.do(key, int(match.group(1)), run)
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
@@ -1,19 +1,37 @@
 from fastapi import FastAPI
+from app.api.auth import router as auth_router
 from app.api.users import router as users_router
 from app.api.bills import router as bills_router
 from app.api.expenses import router as expenses_router
+from app.api.groups import router as groups_router
+from app.api.imports import router as imports_router
+from app.api.batch import router as batch_router
 from app.core.config import settings
+from app.core.profiling import install_profiling
+from app.core.singleflight import SingleFlightMiddleware, singleflight
 import app.models
 
 app = FastAPI(title=settings.app_name,
     description="A comprehensive expense splitting API",
     version="1.0.0")
 
+install_profiling(app)
+app.add_middleware(SingleFlightMiddleware)
+
+app.include_router(auth_router, prefix="/api/v1")
 app.include_router(users_router, prefix="/api/v1")
 app.include_router(bills_router, prefix="/api/v1")
 app.include_router(expenses_router, prefix="/api/v1")
+app.include_router(groups_router, prefix="/api/v1")
+app.include_router(imports_router, prefix="/api/v1")
+app.include_router(batch_router, prefix="/api/v1")
 
 
 @app.get("/")
 def root():
-    return "Hello Expense Splitter"
\ No newline at end of file
+    return "Hello Expense Splitter"
+
+
+@app.get("/metrics")
+def metrics():
+    return {"singleflight": singleflight.stats()}
\ No newline at end of file
@@ -5,12 +5,20 @@ from sqlalchemy import Column, Integer,ForeignKey, Table
 bill_participants = Table(
     "bill_participants",
     Base.metadata,
-    Column("bill_id", Integer, ForeignKey("bills.id")),
-    Column("user_id", Integer, ForeignKey("users.id"))
+    Column("bill_id", Integer, ForeignKey("bills.id", ondelete="CASCADE")),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"))
+)
+
+group_members = Table(
+    "group_members",
+    Base.metadata,
+    Column("group_id", Integer, ForeignKey("groups.id", ondelete="CASCADE")),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"))
 )
 
 from app.models.user import User
 from app.models.bill import Bill
 from app.models.expense import Expense
+from app.models.group import Group, ShardMapping, BillShardMapping
 
-__all__ = ["User", "Bill", "Expense", "bill_participants", "Base"]
\ No newline at end of file
+__all__ = ["User", "Bill", "Expense", "Group", "ShardMapping", "BillShardMapping", "bill_participants", "group_members", "Base"]
\ No newline at end of file
@@ -1,16 +1,23 @@
-from app.core.database import Base
+from app.core.database import Base, SoftDeleteMixin
 from app.models import bill_participants
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
-class Bill(Base):
+class Bill(SoftDeleteMixin, Base):
     __tablename__ = "bills"
+    # Ids are reserved for bills on other shards too, so SQLite must never reuse one
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
     total_amount = Column(Float)
-    created_by = Column(Integer, ForeignKey("users.id"))
+    currency = Column(String(3), nullable=False, server_default="USD")
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
     created_by_user = relationship("User", foreign_keys=[created_by])
-    expenses = relationship("Expense", back_populates="bill")
-    participants = relationship("User", secondary="bill_participants", back_populates="bills")
+    group = relationship("Group", back_populates="bills")
+    expenses = relationship("Expense", back_populates="bill", passive_deletes=True)
+    participants = relationship("User", secondary="bill_participants", back_populates="bills", passive_deletes=True)
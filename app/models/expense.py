@@ -1,15 +1,25 @@
-from app.core.database import Base
-from sqlalchemy import Column, Integer, Float, String, ForeignKey
+from app.core.database import Base, SoftDeleteMixin
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
-class Expense(Base):
+class Expense(SoftDeleteMixin, Base):
     __tablename__ = "expenses"
+    # On Postgres the table is range-partitioned by month on created_at (see the
+    # add_timestamps migration), so its primary key there is (id, created_at).
+    __table_args__ = (
+        Index("ix_expenses_created_at", "created_at", postgresql_using="brin"),
+        # Ids are reserved for expenses on other shards too, so SQLite must never reuse one
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    bill_id = Column(Integer, ForeignKey("bills.id"), nullable=False)
+    bill_id = Column(Integer, ForeignKey("bills.id", ondelete="CASCADE"), nullable=False, index=True)
     amount_owed = Column(Float, nullable=False)
     amount_paid = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False, server_default="USD")
     split_method = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     bill = relationship("Bill", back_populates="expenses")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
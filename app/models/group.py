@@ -0,0 +1,35 @@
+from app.core.database import Base
+from app.models import group_members
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+class Group(Base):
+    __tablename__ = "groups"
+
+    # Ids are allocated globally by the shard map, never by the shard itself
+    id = Column(Integer, primary_key=True, index=True, autoincrement=False)
+    name = Column(String, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    created_by_user = relationship("User", foreign_keys=[created_by])
+    members = relationship("User", secondary="group_members", passive_deletes=True)
+    bills = relationship("Bill", back_populates="group")
+
+
+class ShardMapping(Base):
+    """Global directory row placing a group on a shard (main database only)"""
+    __tablename__ = "shard_map"
+
+    group_id = Column(Integer, primary_key=True)
+    shard_id = Column(Integer, nullable=False, index=True)
+
+
+class BillShardMapping(Base):
+    """Global directory row placing a group bill on a shard other than 0 (main database only)"""
+    __tablename__ = "bill_shard_map"
+
+    # Reserved from the main database's bill ids, so never reused by any shard
+    bill_id = Column(Integer, primary_key=True, autoincrement=False)
+    shard_id = Column(Integer, nullable=False)
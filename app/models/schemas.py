@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Optional, List
+from typing import Dict, Optional, List
+from datetime import datetime
 from pydantic import BaseModel, Field, EmailStr
 from enum import Enum
 
@@ -38,9 +39,22 @@ class UserResponseWithRelations(UserResponse):
     class Config:
         from_attributes = True
 
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
+class Principal(BaseModel):
+    """Authenticated user, resolved from token claims"""
+    id: int
+    email: Optional[str] = None
+    name: Optional[str] = None
+
 class BillBase(BaseModel):
     title: str = Field(min_length=3)
     total_amount: float = Field(gt=0)
+    currency: str = Field(default="USD", pattern=r"^[A-Z]{3}$")
 
 
 class BillCreate(BillBase):
@@ -51,11 +65,14 @@ class BillCreate(BillBase):
 class BillUpdate(BaseModel):
     title: Optional[str] = Field(min_length=3, default=None)
     total_amount: Optional[float] = Field(gt=0, default=None)
+    currency: Optional[str] = Field(pattern=r"^[A-Z]{3}$", default=None)
 
 
 class BillResponse(BillBase):
     id: int
-    created_by: int
+    created_by: Optional[int] = None  # None once the creator's account is deleted
+    group_id: Optional[int] = None
+    created_at: Optional[datetime] = None
     created_by_user: Optional[UserResponse] = None  
     participants: List[UserResponse] = []
     expenses: List[ExpenseResponse] = []  
@@ -72,18 +89,22 @@ class ExpenseBase(BaseModel):
 class ExpenseCreate(ExpenseBase):
     bill_id: int
     user_id: int
+    currency: Optional[str] = Field(pattern=r"^[A-Z]{3}$", default=None)  # Defaults to the bill's
 
 
 class ExpenseUpdate(BaseModel):
     amount_owed: Optional[float] = Field(ge=0, default=None)
     amount_paid: Optional[float] = Field(ge=0, default=None)
     split_method: Optional[SplitMethod] = None
+    currency: Optional[str] = Field(pattern=r"^[A-Z]{3}$", default=None)
 
 
 class ExpenseResponse(ExpenseBase):
     id: int
     bill_id: int
     user_id: int
+    currency: str = "USD"
+    created_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -96,6 +117,111 @@ class ExpenseResponseWithRelations(ExpenseResponse):
     class Config:
         from_attributes = True
 
+class GroupBase(BaseModel):
+    name: str = Field(min_length=3)
+
+
+class GroupCreate(GroupBase):
+    created_by: int
+    member_ids: Optional[List[int]] = []
+
+
+class GroupResponse(GroupBase):
+    id: int
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    members: List[UserResponse] = []
+
+    class Config:
+        from_attributes = True
+
+class ImportStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJobCreate(BaseModel):
+    user_id: int
+    currency: str = Field(default="USD", pattern=r"^[A-Z]{3}$")  # For statements without a currency column
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportJobResponse(BaseModel):
+    id: str
+    user_id: int
+    currency: str = "USD"
+    status: ImportStatus = ImportStatus.PENDING
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_failed: int = 0
+    rows_per_second: float = 0.0
+    error: Optional[str] = None
+    errors: List[ImportRowError] = []  # First MAX_REPORTED_ERRORS row errors
+
+class BatchRequest(BaseModel):
+    users: List[int] = Field(default=[], max_length=500)
+    bills: List[int] = Field(default=[], max_length=500)
+    expenses: List[int] = Field(default=[], max_length=500)
+    include: List[str] = Field(default=[], max_length=20)  # e.g. "users.bills.expenses"
+
+
+class BatchUser(UserResponse):
+    # Relationship ids, set only when the relation was included
+    bill_ids: Optional[List[int]] = None
+    created_bill_ids: Optional[List[int]] = None
+
+
+class BatchBill(BillBase):
+    id: int
+    created_by: Optional[int] = None
+    group_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    participant_ids: Optional[List[int]] = None
+    expense_ids: Optional[List[int]] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BatchResponse(BaseModel):
+    users: Dict[int, BatchUser] = {}
+    bills: Dict[int, BatchBill] = {}
+    expenses: Dict[int, ExpenseResponse] = {}
+
+class Balance(BaseModel):
+    user_id: int
+    owed: float
+    paid: float
+    net: float  # paid - owed; positive means the user is owed money
+
+
+class BillBalancesResponse(BaseModel):
+    bill_id: int
+    currency: str
+    balances: List[Balance] = []
+
+
+class Transfer(BaseModel):
+    from_user_id: int
+    to_user_id: int
+    amount: float
+
+
+class SettlementResponse(BaseModel):
+    bill_id: int
+    currency: str
+    transfers: List[Transfer] = []
+
+
+class UserBalanceResponse(Balance):
+    currency: str
+
 UserResponseWithRelations.model_rebuild()
 BillResponse.model_rebuild()
 ExpenseResponseWithRelations.model_rebuild()
\ No newline at end of file
@@ -1,10 +1,12 @@
-from app.core.database import Base
+from app.core.database import Base, SoftDeleteMixin
 from app.models import bill_participants
 from sqlalchemy import Boolean, Column, Integer, String,Boolean
 from sqlalchemy.orm import relationship
 
-class User(Base):
+class User(SoftDeleteMixin, Base):
     __tablename__ = "users"
+    # Shards keep copies under the global id, so SQLite must never reuse one
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -12,5 +14,5 @@ class User(Base):
     password = Column(String, nullable=False)  
     is_active = Column(Boolean, default=True)
 
-    bills = relationship("Bill", secondary="bill_participants", back_populates="participants")
-    created_bills = relationship("Bill", back_populates="created_by_user")
\ No newline at end of file
+    bills = relationship("Bill", secondary="bill_participants", back_populates="participants", passive_deletes=True)
+    created_bills = relationship("Bill", back_populates="created_by_user", passive_deletes=True)
\ No newline at end of file